@@ -25,39 +25,24 @@ def _load_modules():
 
 
 def build_adj(edges):
-    nodes = []
-    seen_nodes = set()
-    seen_edges = set()
-    out = {}
-    inc = {}
-
-    def add_node(node):
-        if node not in seen_nodes:
-            seen_nodes.add(node)
-            nodes.append(node)
-
+    adj = {}
     for u, v in edges:
-        if (u, v) in seen_edges:
+        if u not in adj:
+            adj[u] = {"out": [], "in": []}
+        if v not in adj:
+            adj[v] = {"out": [], "in": []}
+        if v in adj[u]["out"]:
             continue
-        seen_edges.add((u, v))
-        add_node(u)
-        add_node(v)
-        out.setdefault(u, []).append(v)
-        inc.setdefault(v, []).append(u)
-
-    for n in nodes:
-        out.setdefault(n, [])
-        inc.setdefault(n, [])
-
-    return {n: {"out": out[n], "in": inc[n]} for n in nodes}
+        adj[u]["out"].append(v)
+        adj[v]["in"].append(u)
+    return adj
 
 
-def write_cfg(
+def cfg_dot(
     compute_pst,
     cfg_with_regions_to_dot,
     prefix,
     adj,
-    out_dir,
     *,
     show_labels=True,
 ):
@@ -67,13 +52,12 @@ def write_cfg(
         include_super=True,
         show_edge_labels=show_labels,
     )
-    path = out_dir / f"{prefix}.dot"
-    path.write_text(dot)
     edge_count = sum(len(info["out"]) for info in adj.values())
     print(
         f"{prefix}: nodes={len(adj)} edges={edge_count} "
-        f"regions={len(result.regions)} wrote {path}"
+        f"regions={len(result.regions)}"
     )
+    return dot
 
 
 def main():
@@ -93,7 +77,7 @@ def main():
 
     compute_pst, cfg_with_regions_to_dot = _load_modules()
 
-    names = []
+    graphs = {}
 
     edges_small = [
         ("S", "A"),
@@ -104,14 +88,12 @@ def main():
         ("D", "T"),
     ]
     adj_small = build_adj(edges_small)
-    write_cfg(
+    graphs["cfg_regions"] = cfg_dot(
         compute_pst,
         cfg_with_regions_to_dot,
         "cfg_regions",
         adj_small,
-        out_dir,
     )
-    names.append("cfg_regions")
 
     edges_paper = [
         ("start", "n1"),
@@ -138,31 +120,27 @@ def main():
         ("n16", "end"),
     ]
     adj_paper = build_adj(edges_paper)
-    write_cfg(
+    graphs["cfg_regions_paper"] = cfg_dot(
         compute_pst,
         cfg_with_regions_to_dot,
         "cfg_regions_paper",
         adj_paper,
-        out_dir,
         show_labels=False,
     )
-    names.append("cfg_regions_paper")
 
     dot = shutil.which("dot")
     if dot:
-        for name in names:
-            dot_path = out_dir / f"{name}.dot"
-            svg_path = out_dir / f"{name}.svg"
+        for name, dot_text in graphs.items():
             subprocess.run(
-                [dot, "-Tsvg", str(dot_path), "-o", str(svg_path)],
+                [dot, "-Tsvg", "-o", str(out_dir / f"{name}.svg")],
+                input=dot_text,
+                text=True,
                 check=True,
             )
-            try:
-                dot_path.unlink()
-            except FileNotFoundError:
-                pass
         print(f"SVGs written to {out_dir}")
     else:
+        for name, dot_text in graphs.items():
+            (out_dir / f"{name}.dot").write_text(dot_text)
         print("Graphviz 'dot' not found; install with: brew install graphviz")
         print(f"DOT files are in {out_dir}")
 
@@ -1,7 +1,17 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, Hashable, Iterable, List, Optional, Set
+from itertools import chain
+from typing import Dict, Hashable, Iterable, List, Optional
+
+try:
+    from . import pst_core as _core
+except ImportError:
+    import pst_core as _core
+
+# Below this many edges the JIT warm-up costs more than the Python loops.
+_NUMBA_MIN_EDGES = 2048
 
 Node = Hashable
 Adj = Dict[Node, Dict[str, Iterable[Node]]]
@@ -32,95 +42,94 @@ class PSTResult:
     edges: Dict[int, EdgeInfo]
     super_entry: Node
     super_exit: Node
-
-
-class _Edge:
-    __slots__ = (
-        "id",
-        "u",
-        "v",
-        "kind",
-        "class_id",
-        "recent_size",
-        "recent_class",
-        "list_node",
+    # Dominance data over the edge-split graph, kept so consumers can
+    # answer containment queries without recomputing it. Node ids follow
+    # the insertion order of the input, then super entry/exit, then one
+    # node per non-back edge (see _node_index and _edge_node_index).
+    _node_index: Optional[Dict[Node, int]] = field(
+        default=None, repr=False, compare=False
+    )
+    _edge_node_index: Optional[Dict[int, int]] = field(
+        default=None, repr=False, compare=False
+    )
+    _dfs_tin: Optional[List[int]] = field(default=None, repr=False, compare=False)
+    _dfs_tout: Optional[List[int]] = field(default=None, repr=False, compare=False)
+    _pdom_tin: Optional[List[int]] = field(default=None, repr=False, compare=False)
+    _pdom_tout: Optional[List[int]] = field(default=None, repr=False, compare=False)
+    # Filled lazily by the DOT emitters in visualize.
+    _render_cache: Dict[object, object] = field(
+        default_factory=dict, repr=False, compare=False
     )
 
-    def __init__(self, edge_id: int, u: int, v: int, kind: str) -> None:
-        self.id = edge_id
-        self.u = u
-        self.v = v
-        self.kind = kind
-        self.class_id: Optional[int] = None
-        self.recent_size: Optional[int] = None
-        self.recent_class: Optional[int] = None
-        self.list_node: Optional[_BracketNode] = None
-
-
-class _BracketNode:
-    __slots__ = ("edge", "prev", "next")
 
-    def __init__(self, edge: _Edge) -> None:
-        self.edge = edge
-        self.prev: Optional[_BracketNode] = None
-        self.next: Optional[_BracketNode] = None
+# Edges are stored as parallel arrays indexed by edge id; ``edge_kind``
+# holds an index into _EDGE_KINDS.
+_EDGE_KINDS = ("orig", "super_entry", "super_exit", "back")
+_KIND_BACK = _EDGE_KINDS.index("back")
 
 
-class _BracketList:
-    __slots__ = ("head", "tail", "size")
+class _BracketLists:
+    """
+    Doubly-linked bracket lists threaded through parallel int arrays.
 
-    def __init__(self) -> None:
-        self.head: Optional[_BracketNode] = None
-        self.tail: Optional[_BracketNode] = None
-        self.size = 0
+    Brackets are edge ids and every edge sits on at most one list, so the
+    links live in ``nxt``/``prv`` slots indexed by edge id and each list is
+    a ``head``/``tail``/``size`` triple indexed by list id.
+    """
 
-    def push(self, edge: _Edge) -> None:
-        node = _BracketNode(edge)
-        edge.list_node = node
-        if self.tail is None:
-            self.head = node
-            self.tail = node
+    __slots__ = ("head", "tail", "size", "nxt", "prv", "linked")
+
+    def __init__(self, list_count: int, capacity: int) -> None:
+        self.head = array("i", [-1]) * list_count
+        self.tail = array("i", [-1]) * list_count
+        self.size = array("i", [0]) * list_count
+        self.nxt = array("i", [-1]) * capacity
+        self.prv = array("i", [-1]) * capacity
+        self.linked = bytearray(capacity)
+
+    def push(self, bl: int, edge_id: int) -> None:
+        tail = self.tail[bl]
+        self.prv[edge_id] = tail
+        self.nxt[edge_id] = -1
+        if tail == -1:
+            self.head[bl] = edge_id
         else:
-            node.prev = self.tail
-            self.tail.next = node
-            self.tail = node
-        self.size += 1
-
-    def delete(self, edge: _Edge) -> None:
-        node = edge.list_node
-        if node is None:
+            self.nxt[tail] = edge_id
+        self.tail[bl] = edge_id
+        self.size[bl] += 1
+        self.linked[edge_id] = 1
+
+    def delete(self, bl: int, edge_id: int) -> None:
+        if not self.linked[edge_id]:
             return
-        if node.prev is None:
-            self.head = node.next
+        prv = self.prv[edge_id]
+        nxt = self.nxt[edge_id]
+        if prv == -1:
+            self.head[bl] = nxt
         else:
-            node.prev.next = node.next
-        if node.next is None:
-            self.tail = node.prev
+            self.nxt[prv] = nxt
+        if nxt == -1:
+            self.tail[bl] = prv
         else:
-            node.next.prev = node.prev
-        edge.list_node = None
-        node.prev = None
-        node.next = None
-        self.size -= 1
-
-    def top(self) -> Optional[_Edge]:
-        return self.tail.edge if self.tail is not None else None
-
-
-def _concat_blist(left: _BracketList, right: _BracketList) -> _BracketList:
-    if left.size == 0:
-        return right
-    if right.size == 0:
-        return left
-    left.tail.next = right.head
-    right.head.prev = left.tail
-    left.tail = right.tail
-    left.size += right.size
-    return left
-
-
-def _unique_label(base: str, existing: Iterable[Node]) -> str:
-    used = set(existing)
+            self.prv[nxt] = prv
+        self.linked[edge_id] = 0
+        self.size[bl] -= 1
+
+    def prepend(self, bl: int, other: int) -> None:
+        """Move the brackets of list ``other`` in front of list ``bl``."""
+        if self.size[other] == 0:
+            return
+        if self.size[bl] == 0:
+            self.head[bl] = self.head[other]
+            self.tail[bl] = self.tail[other]
+        else:
+            self.nxt[self.tail[other]] = self.head[bl]
+            self.prv[self.head[bl]] = self.tail[other]
+            self.head[bl] = self.head[other]
+        self.size[bl] += self.size[other]
+
+
+def _unique_label(base: str, used: set) -> str:
     if base not in used:
         return base
     i = 1
@@ -133,78 +142,145 @@ def _unique_label(base: str, existing: Iterable[Node]) -> str:
 
 def _dfs_edge_order(
     directed_adj: List[List[int]],
-    edges: List[_Edge],
+    edge_v: array,
     root: int,
 ) -> List[int]:
     visited = [False] * len(directed_adj)
     order: List[int] = []
+    stack_node: List[int] = []
+    stack_idx: List[int] = []
 
-    def walk(start: int) -> None:
-        stack = [(start, iter(directed_adj[start]))]
+    for start in chain((root,), range(len(directed_adj))):
+        if visited[start]:
+            continue
         visited[start] = True
-        while stack:
-            node, it = stack[-1]
-            try:
-                edge_id = next(it)
-            except StopIteration:
-                stack.pop()
+        stack_node.append(start)
+        stack_idx.append(0)
+        while stack_node:
+            out = directed_adj[stack_node[-1]]
+            top_i = stack_idx[-1]
+            if top_i == len(out):
+                stack_node.pop()
+                stack_idx.pop()
                 continue
+            stack_idx[-1] = top_i + 1
+            edge_id = out[top_i]
             order.append(edge_id)
-            nxt = edges[edge_id].v
+            nxt = edge_v[edge_id]
             if not visited[nxt]:
                 visited[nxt] = True
-                stack.append((nxt, iter(directed_adj[nxt])))
-
-    walk(root)
-    for n in range(len(directed_adj)):
-        if not visited[n]:
-            walk(n)
+                stack_node.append(nxt)
+                stack_idx.append(0)
 
     return order
 
 
+def _undirected_csr(
+    node_count: int, edge_u: array, edge_v: array
+) -> tuple[array, array, array]:
+    """
+    Incidence lists in CSR form: the slots ``und_ptr[n]:und_ptr[n + 1]`` of
+    ``und_edge``/``und_other`` hold node ``n``'s edges and far endpoints,
+    in edge order with a self-loop listed twice.
+    """
+    und_ptr = array("i", [0]) * (node_count + 1)
+    for u in edge_u:
+        und_ptr[u + 1] += 1
+    for v in edge_v:
+        und_ptr[v + 1] += 1
+    for n in range(node_count):
+        und_ptr[n + 1] += und_ptr[n]
+
+    size = und_ptr[node_count]
+    und_edge = array("i", [0]) * size
+    und_other = array("i", [0]) * size
+    fill = und_ptr[:-1]
+    for edge_id in range(len(edge_u)):
+        u = edge_u[edge_id]
+        v = edge_v[edge_id]
+        pos = fill[u]
+        und_edge[pos] = edge_id
+        und_other[pos] = v
+        fill[u] = pos + 1
+        pos = fill[v]
+        und_edge[pos] = edge_id
+        und_other[pos] = u
+        fill[v] = pos + 1
+    return und_ptr, und_edge, und_other
+
+
+def _directed_csr(
+    node_count: int, src: array, dst: array
+) -> tuple[array, array]:
+    """
+    Adjacency in CSR form: ``idx[ptr[n]:ptr[n + 1]]`` lists the ``dst`` of
+    every arc leaving ``n``, in arc order.
+    """
+    ptr = array("i", [0]) * (node_count + 1)
+    for u in src:
+        ptr[u + 1] += 1
+    for n in range(node_count):
+        ptr[n + 1] += ptr[n]
+
+    idx = array("i", [0]) * len(src)
+    fill = ptr[:-1]
+    for u, v in zip(src, dst):
+        idx[fill[u]] = v
+        fill[u] += 1
+    return ptr, idx
+
+
 def _cycle_equivalence(
     node_count: int,
-    edges: List[_Edge],
-    undirected_adj: List[List[tuple[int, int]]],
+    edge_class_id: array,
+    und_ptr: array,
+    und_edge: array,
+    und_other: array,
     root: int,
 ) -> None:
-    edge_count = len(edges)
-    dfsnum = [0] * node_count
-    parent = [-1] * node_count
-    parent_edge = [-1] * node_count
+    edge_count = len(edge_class_id)
+    dfsnum = array("i", [0]) * node_count
+    parent = array("i", [-1]) * node_count
+    parent_edge = array("i", [-1]) * node_count
     children: List[List[int]] = [[] for _ in range(node_count)]
     backedges_from: List[List[int]] = [[] for _ in range(node_count)]
     backedges_to: List[List[int]] = [[] for _ in range(node_count)]
-    edge_upper = [-1] * edge_count
-    edge_seen = [False] * edge_count
+    edge_upper = array("i", [-1]) * edge_count
+    edge_seen = bytearray(edge_count)
     postorder: List[int] = []
 
+    # Each node is on the DFS stack at most once, so its next incidence
+    # slot can live in a per-node cursor instead of on the stack.
     time = 0
+    cur = und_ptr[:-1]
+    stack_node: List[int] = []
 
-    def dfs(start: int) -> None:
-        nonlocal time
-        stack = [(start, iter(undirected_adj[start]))]
+    for start in chain((root,), range(node_count)):
+        if dfsnum[start] != 0:
+            continue
         time += 1
         dfsnum[start] = time
-        while stack:
-            node, it = stack[-1]
-            try:
-                edge_id, other = next(it)
-            except StopIteration:
+        stack_node.append(start)
+        while stack_node:
+            node = stack_node[-1]
+            pos = cur[node]
+            if pos == und_ptr[node + 1]:
                 postorder.append(node)
-                stack.pop()
+                stack_node.pop()
                 continue
+            cur[node] = pos + 1
+            edge_id = und_edge[pos]
+            other = und_other[pos]
             if edge_seen[edge_id]:
                 continue
-            edge_seen[edge_id] = True
+            edge_seen[edge_id] = 1
             if dfsnum[other] == 0:
                 parent[other] = node
                 parent_edge[other] = edge_id
                 children[node].append(other)
                 time += 1
                 dfsnum[other] = time
-                stack.append((other, iter(undirected_adj[other])))
+                stack_node.append(other)
             else:
                 if dfsnum[other] < dfsnum[node]:
                     desc, anc = node, other
@@ -214,26 +290,24 @@ def _cycle_equivalence(
                 backedges_to[anc].append(edge_id)
                 edge_upper[edge_id] = anc
 
-    dfs(root)
-    for n in range(node_count):
-        if dfsnum[n] == 0:
-            dfs(n)
-
-    node_by_dfsnum = [0] * (node_count + 1)
+    node_by_dfsnum = array("i", [0]) * (node_count + 1)
     for n in range(node_count):
         node_by_dfsnum[dfsnum[n]] = n
 
-    capping_to: List[List[_Edge]] = [[] for _ in range(node_count)]
-    blists: List[_BracketList] = [_BracketList() for _ in range(node_count)]
-    hi = [node_count + 1] * node_count
+    # Capping backedges get ids from edge_count up; each node adds at most
+    # one, and only their bracket bookkeeping is ever needed.
+    capacity = edge_count + node_count
+    cap_count = 0
+    capping_to: List[List[int]] = [[] for _ in range(node_count)]
+    brackets = _BracketLists(node_count, capacity)
+    bl_push, bl_delete, bl_prepend = brackets.push, brackets.delete, brackets.prepend
+    bl_tail, bl_size = brackets.tail, brackets.size
+    recent_size = array("i", [-1]) * capacity
+    recent_class = array("i", [-1]) * capacity
+    hi = array("i", [node_count + 1]) * node_count
 
     class_counter = 0
 
-    def new_class() -> int:
-        nonlocal class_counter
-        class_counter += 1
-        return class_counter
-
     for n in postorder:
         hi0 = node_count + 1
         for e_id in backedges_from[n]:
@@ -255,103 +329,224 @@ def _cycle_equivalence(
 
         hi[n] = hi0 if hi0 < hi1 else hi1
 
-        bl = _BracketList()
         for c in children[n]:
-            bl = _concat_blist(blists[c], bl)
+            bl_prepend(n, c)
 
-        for cap in capping_to[n]:
-            bl.delete(cap)
+        for cap_id in capping_to[n]:
+            bl_delete(n, cap_id)
 
         for b_id in backedges_to[n]:
-            b = edges[b_id]
-            bl.delete(b)
-            if b.class_id is None:
-                b.class_id = new_class()
+            bl_delete(n, b_id)
+            if edge_class_id[b_id] == -1:
+                class_counter += 1
+                edge_class_id[b_id] = class_counter
 
         for e_id in backedges_from[n]:
-            bl.push(edges[e_id])
+            bl_push(n, e_id)
 
         if hi2 < hi0:
             upper = node_by_dfsnum[hi2]
-            cap = _Edge(edge_count, n, upper, "capping")
-            edge_count += 1
-            bl.push(cap)
-            capping_to[upper].append(cap)
+            cap_id = edge_count + cap_count
+            cap_count += 1
+            bl_push(n, cap_id)
+            capping_to[upper].append(cap_id)
 
         if parent[n] != -1:
-            tree_edge = edges[parent_edge[n]]
-            top = bl.top()
-            if top is None:
+            tree_edge = parent_edge[n]
+            top = bl_tail[n]
+            if top == -1:
                 raise ValueError("empty bracket list; graph may not be strongly connected")
-            if top.recent_size != bl.size:
-                top.recent_size = bl.size
-                top.recent_class = new_class()
-            tree_edge.class_id = top.recent_class
-            if top.recent_size == 1 and top.kind != "capping":
-                top.class_id = tree_edge.class_id
-
-        blists[n] = bl
+            size = bl_size[n]
+            if recent_size[top] != size:
+                recent_size[top] = size
+                class_counter += 1
+                recent_class[top] = class_counter
+            edge_class_id[tree_edge] = recent_class[top]
+            if size == 1 and top < edge_count:
+                edge_class_id[top] = recent_class[top]
+
+
+def _compute_postorder(succ_ptr: array, succ_idx: array, start: int) -> List[int]:
+    visited = bytearray(len(succ_ptr) - 1)
+    order: List[int] = []
+    stack_node = [start]
+    stack_pos = [succ_ptr[start]]
+    visited[start] = 1
+    while stack_node:
+        node = stack_node[-1]
+        pos = stack_pos[-1]
+        if pos == succ_ptr[node + 1]:
+            order.append(node)
+            stack_node.pop()
+            stack_pos.pop()
+            continue
+        stack_pos[-1] = pos + 1
+        nxt = succ_idx[pos]
+        if not visited[nxt]:
+            visited[nxt] = 1
+            stack_node.append(nxt)
+            stack_pos.append(succ_ptr[nxt])
+    return order
 
 
-def _dominators(total: int, start: int, preds: List[List[int]]) -> List[Set[int]]:
-    dom = [set(range(total)) for _ in range(total)]
-    dom[start] = {start}
+def _idoms(
+    pred_ptr: array, pred_idx: array, postorder: List[int], start: int
+) -> List[int]:
+    """
+    Immediate dominators via Cooper-Harvey-Kennedy. Nodes not reachable
+    from ``start`` keep an idom of -1; ``start`` is its own idom.
+    """
+    total = len(pred_ptr) - 1
+    po_num = [-1] * total
+    for i, n in enumerate(postorder):
+        po_num[n] = i
+
+    idom = [-1] * total
+    idom[start] = start
+    rpo = postorder[::-1]
     changed = True
     while changed:
         changed = False
-        for n in range(total):
+        for n in rpo:
             if n == start:
                 continue
-            if not preds[n]:
-                new_dom = {n}
-            else:
-                inter = set(range(total))
-                for p in preds[n]:
-                    inter &= dom[p]
-                new_dom = inter | {n}
-            if new_dom != dom[n]:
-                dom[n] = new_dom
+            new_idom = -1
+            for p in pred_idx[pred_ptr[n] : pred_ptr[n + 1]]:
+                if idom[p] == -1:
+                    continue
+                if new_idom == -1:
+                    new_idom = p
+                    continue
+                f1 = p
+                f2 = new_idom
+                while f1 != f2:
+                    while po_num[f1] < po_num[f2]:
+                        f1 = idom[f1]
+                    while po_num[f2] < po_num[f1]:
+                        f2 = idom[f2]
+                new_idom = f1
+            if idom[n] != new_idom:
+                idom[n] = new_idom
                 changed = True
-    return dom
+    return idom
+
+
+def _dom_tree_intervals(idom: List[int], start: int) -> tuple[List[int], List[int]]:
+    """
+    DFS entry/exit numbers on the dominator tree, so that ``a`` dominates
+    ``b`` iff ``tin[a] <= tin[b] and tout[b] <= tout[a]``. Unreachable
+    nodes get ``(total, -1)``: like the iterative fixpoint, every node
+    dominates them and they dominate only each other.
+    """
+    total = len(idom)
+    idom_children: List[List[int]] = [[] for _ in range(total)]
+    for n, d in enumerate(idom):
+        if d != -1 and n != start:
+            idom_children[d].append(n)
+
+    tin = [total] * total
+    tout = [-1] * total
+    time = 0
+    tin[start] = time
+    stack_node = [start]
+    stack_idx = [0]
+    while stack_node:
+        node = stack_node[-1]
+        kids = idom_children[node]
+        top_i = stack_idx[-1]
+        if top_i == len(kids):
+            tout[node] = time
+            stack_node.pop()
+            stack_idx.pop()
+            continue
+        stack_idx[-1] = top_i + 1
+        child = kids[top_i]
+        time += 1
+        tin[child] = time
+        stack_node.append(child)
+        stack_idx.append(0)
+    return tin, tout
 
 
 def _edge_split_dominators(
     node_count: int,
-    edges: List[_Edge],
+    edge_u: array,
+    edge_v: array,
+    edge_kind: array,
     super_entry_idx: int,
     super_exit_idx: int,
-) -> tuple[Dict[int, int], List[Set[int]], List[Set[int]]]:
+) -> tuple[
+    Dict[int, int],
+    List[int],
+    tuple[List[int], List[int]],
+    tuple[List[int], List[int]],
+]:
     edge_node_index: Dict[int, int] = {}
-    for edge in edges:
-        if edge.kind in ("back", "capping"):
-            continue
-        edge_node_index[edge.id] = node_count + len(edge_node_index)
+    for edge_id, kind in enumerate(edge_kind):
+        if kind != _KIND_BACK:
+            edge_node_index[edge_id] = node_count + len(edge_node_index)
 
+    # Each non-back edge u -> v becomes u -> e -> v.
     total = node_count + len(edge_node_index)
-    preds: List[List[int]] = [[] for _ in range(total)]
-    succs: List[List[int]] = [[] for _ in range(total)]
+    src = array("i")
+    dst = array("i")
+    for edge_id, e_idx in edge_node_index.items():
+        src.append(edge_u[edge_id])
+        dst.append(e_idx)
+        src.append(e_idx)
+        dst.append(edge_v[edge_id])
+    succ_ptr, succ_idx = _directed_csr(total, src, dst)
+    pred_ptr, pred_idx = _directed_csr(total, dst, src)
+
+    # Both directions share the indexing and CSR arrays above, but run
+    # their own sweeps: each converges on its own order, and a joint loop
+    # would keep revisiting the direction that had already settled.
+    use_numba = _core.NUMBA_AVAILABLE and len(edge_kind) >= _NUMBA_MIN_EDGES
+    idoms = _core.idoms if use_numba else _idoms
+    dom_idom = idoms(
+        pred_ptr,
+        pred_idx,
+        _compute_postorder(succ_ptr, succ_idx, super_entry_idx),
+        super_entry_idx,
+    )
+    pdom_idom = idoms(
+        succ_ptr,
+        succ_idx,
+        _compute_postorder(pred_ptr, pred_idx, super_exit_idx),
+        super_exit_idx,
+    )
+    dom = _dom_tree_intervals(dom_idom, super_entry_idx)
+    postdom = _dom_tree_intervals(pdom_idom, super_exit_idx)
+    return edge_node_index, dom_idom, dom, postdom
 
-    for edge in edges:
-        if edge.kind in ("back", "capping"):
-            continue
-        e_idx = edge_node_index[edge.id]
-        succs[edge.u].append(e_idx)
-        preds[e_idx].append(edge.u)
-        succs[e_idx].append(edge.v)
-        preds[edge.v].append(e_idx)
 
-    dom = _dominators(total, super_entry_idx, preds)
-    postdom = _dominators(total, super_exit_idx, succs)
-    return edge_node_index, dom, postdom
+def _region_nested(
+    dom: tuple[List[int], List[int]],
+    postdom: tuple[List[int], List[int]],
+    outer: tuple[int, int],
+    inner: tuple[int, int],
+) -> bool:
+    """
+    Whether the region with edge-split (entry, exit) nodes ``outer``
+    contains ``inner``: its entry dominates the inner entry and its exit
+    postdominates the inner exit.
+    """
+    tin_d, tout_d = dom
+    tin_pd, tout_pd = postdom
+    return (
+        tin_d[outer[0]] <= tin_d[inner[0]]
+        and tout_d[inner[0]] <= tout_d[outer[0]]
+        and tin_pd[outer[1]] <= tin_pd[inner[1]]
+        and tout_pd[inner[1]] <= tout_pd[outer[1]]
+    )
 
 
-def compute_pst(adj: Adj, *, strict: bool = True) -> PSTResult:
+def _augment_graph(
+    adj: Adj,
+) -> tuple[List[Node], List[tuple[Node, Node, str]], Node, Node]:
     """
-    Build the Program Structure Tree (PST) for a directed graph using the
-    linear-time cycle-equivalence algorithm from Johnson-Pearson-Pingali.
-
-    The input graph may have multiple entries/exits; super-entry and
-    super-exit nodes are added automatically.
+    Nodes in first-seen order and edges including the super entry/exit
+    edges and the closing back edge, plus the two super node labels.
     """
     nodes_order: List[Node] = []
     node_seen: set[Node] = set()
@@ -396,35 +591,61 @@ def compute_pst(adj: Adj, *, strict: bool = True) -> PSTResult:
 
     edges_spec.append((super_exit, super_entry, "back"))
 
-    node_index = {n: i for i, n in enumerate(nodes_order)}
-    edges: List[_Edge] = []
-    directed_adj: List[List[int]] = [[] for _ in range(len(nodes_order))]
+    return nodes_order, edges_spec, super_entry, super_exit
 
-    for u, v, kind in edges_spec:
-        edge_id = len(edges)
-        edge = _Edge(edge_id, node_index[u], node_index[v], kind)
-        edges.append(edge)
+
+def compute_pst(adj: Adj, *, strict: bool = True) -> PSTResult:
+    """
+    Build the Program Structure Tree (PST) for a directed graph using the
+    linear-time cycle-equivalence algorithm from Johnson-Pearson-Pingali.
+
+    The input graph may have multiple entries/exits; super-entry and
+    super-exit nodes are added automatically.
+    """
+    nodes_order, edges_spec, super_entry, super_exit = _augment_graph(adj)
+
+    node_index = {n: i for i, n in enumerate(nodes_order)}
+    node_count = len(nodes_order)
+    edge_count = len(edges_spec)
+    edge_u = array("i", [0]) * edge_count
+    edge_v = array("i", [0]) * edge_count
+    edge_kind = array("b", [0]) * edge_count
+    edge_class_id = array("i", [-1]) * edge_count
+    directed_adj: List[List[int]] = [[] for _ in range(node_count)]
+
+    for edge_id, (u, v, kind) in enumerate(edges_spec):
+        u_idx = node_index[u]
+        v_idx = node_index[v]
+        edge_u[edge_id] = u_idx
+        edge_v[edge_id] = v_idx
+        edge_kind[edge_id] = _EDGE_KINDS.index(kind)
         if kind != "back":
-            directed_adj[edge.u].append(edge_id)
+            directed_adj[u_idx].append(edge_id)
 
-    undirected_adj: List[List[tuple[int, int]]] = [[] for _ in range(len(nodes_order))]
-    for edge in edges:
-        undirected_adj[edge.u].append((edge.id, edge.v))
-        undirected_adj[edge.v].append((edge.id, edge.u))
+    und_ptr, und_edge, und_other = _undirected_csr(node_count, edge_u, edge_v)
 
     root = node_index[super_entry]
-    _cycle_equivalence(len(nodes_order), edges, undirected_adj, root)
+    use_numba = _core.NUMBA_AVAILABLE and edge_count >= _NUMBA_MIN_EDGES
+    if use_numba:
+        edge_class_id = array(
+            "i",
+            _core.cycle_equivalence_classes(
+                node_count, edge_count, und_ptr, und_edge, und_other, root
+            ),
+        )
+    else:
+        _cycle_equivalence(
+            node_count, edge_class_id, und_ptr, und_edge, und_other, root
+        )
 
-    edge_order = _dfs_edge_order(directed_adj, edges, root)
+    edge_order = _dfs_edge_order(directed_adj, edge_v, root)
 
     regions: Dict[int, RegionInfo] = {}
-    entry_map: Dict[int, int] = {}
-    exit_map: Dict[int, int] = {}
     last_edge_by_class: Dict[int, int] = {}
 
     for edge_id in edge_order:
-        cls = edges[edge_id].class_id
-        if cls is None:
+        cls = edge_class_id[edge_id]
+        if cls == -1:
             continue
         prev = last_edge_by_class.get(cls)
         if prev is not None:
@@ -436,63 +657,97 @@ def compute_pst(adj: Adj, *, strict: bool = True) -> PSTResult:
                 parent=None,
             )
             regions[region_id] = region
-            entry_map[prev] = region_id
-            exit_map[edge_id] = region_id
         last_edge_by_class[cls] = edge_id
 
     root_region = RegionInfo(id=0, entry_edge=None, exit_edge=None, parent=None)
     regions[0] = root_region
 
-    edge_node_index, dom, postdom = _edge_split_dominators(
-        len(nodes_order),
-        edges,
-        node_index[super_entry],
+    super_entry_idx = node_index[super_entry]
+    edge_node_index, dom_idom, dom, postdom = _edge_split_dominators(
+        node_count,
+        edge_u,
+        edge_v,
+        edge_kind,
+        super_entry_idx,
         node_index[super_exit],
     )
-
-    for region in regions.values():
+    tin_d, tout_d = dom
+    tin_pd, tout_pd = postdom
+
+    # A region's entry must dominate the child's entry, so the only
+    # candidate parents are regions entered on the child's idom chain.
+    entry_by_edgenode: Dict[int, int] = {}
+    region_nodes: Dict[int, tuple[int, int]] = {}
+    for region_id, region in regions.items():
         region.children = []
-
-    def contains(parent_id: int, child_id: int) -> bool:
-        if parent_id == 0:
-            return True
-        parent = regions[parent_id]
-        child = regions[child_id]
-        if parent.entry_edge is None or parent.exit_edge is None:
-            return False
-        if child.entry_edge is None or child.exit_edge is None:
-            return False
-        p_entry = edge_node_index.get(parent.entry_edge)
-        p_exit = edge_node_index.get(parent.exit_edge)
-        c_entry = edge_node_index.get(child.entry_edge)
-        c_exit = edge_node_index.get(child.exit_edge)
-        if p_entry is None or p_exit is None or c_entry is None or c_exit is None:
-            return False
-        return p_entry in dom[c_entry] and p_exit in postdom[c_exit]
-
-    for region_id in list(regions.keys()):
-        if region_id == 0:
+        if region_id != 0:
+            region.parent = 0
+            e_entry = edge_node_index[region.entry_edge]
+            entry_by_edgenode[e_entry] = region_id
+            region_nodes[region_id] = (e_entry, edge_node_index[region.exit_edge])
+
+    # Visit the edge-split nodes in dominator-tree preorder (tin order), so
+    # every candidate parent is placed before the regions it may contain.
+    # entry_up[n] is the nearest strict dominator of n that is a region
+    # entry. The first region entered there that contains the child is its
+    # parent; a candidate that does not contain the child hands the search
+    # to its own parent, since a region entered above it that contains the
+    # child also contains the candidate. Sequential regions then cost one
+    # step each instead of a walk over the whole chain.
+    total = len(dom_idom)
+    preorder = [-1] * total
+    for n, t in enumerate(tin_d):
+        if t < total:
+            preorder[t] = n
+    entry_up = [-1] * total
+    for n in preorder:
+        if n == -1:
+            break
+        if n == super_entry_idx:
+            continue
+        d = dom_idom[n]
+        up = d if d in entry_by_edgenode else entry_up[d]
+        entry_up[n] = up
+        region_id = entry_by_edgenode.get(n)
+        if region_id is None or up == -1:
+            continue
+        child = region_nodes[region_id]
+        candidate_id = entry_by_edgenode[up]
+        while candidate_id != 0 and not _region_nested(
+            dom, postdom, region_nodes[candidate_id], child
+        ):
+            candidate_id = regions[candidate_id].parent
+        regions[region_id].parent = candidate_id
+
+    # Unreachable entries are dominated by every edge, so every other
+    # region is a candidate; keep the innermost containing one.
+    for region_id, child in region_nodes.items():
+        if dom_idom[child[0]] != -1:
             continue
         parent_id = 0
-        for candidate_id in regions:
-            if candidate_id in (0, region_id):
+        for candidate_id, outer in region_nodes.items():
+            if candidate_id == region_id or not _region_nested(
+                dom, postdom, outer, child
+            ):
                 continue
-            if contains(candidate_id, region_id):
-                if parent_id == 0 or contains(parent_id, candidate_id):
-                    parent_id = candidate_id
+            if parent_id == 0 or _region_nested(
+                dom, postdom, region_nodes[parent_id], outer
+            ):
+                parent_id = candidate_id
         regions[region_id].parent = parent_id
-        regions[parent_id].children.append(region_id)
+
+    for region_id, region in regions.items():
+        if region_id != 0:
+            regions[region.parent].children.append(region_id)
 
     edges_out: Dict[int, EdgeInfo] = {}
-    for edge in edges:
-        if edge.kind == "capping":
-            continue
-        edges_out[edge.id] = EdgeInfo(
-            id=edge.id,
-            src=nodes_order[edge.u],
-            dst=nodes_order[edge.v],
-            kind=edge.kind,
-            class_id=edge.class_id if edge.class_id is not None else -1,
+    for edge_id in range(edge_count):
+        edges_out[edge_id] = EdgeInfo(
+            id=edge_id,
+            src=nodes_order[edge_u[edge_id]],
+            dst=nodes_order[edge_v[edge_id]],
+            kind=_EDGE_KINDS[edge_kind[edge_id]],
+            class_id=edge_class_id[edge_id],
         )
 
     return PSTResult(
@@ -501,6 +756,12 @@ def compute_pst(adj: Adj, *, strict: bool = True) -> PSTResult:
         edges=edges_out,
         super_entry=super_entry,
         super_exit=super_exit,
+        _node_index=node_index,
+        _edge_node_index=edge_node_index,
+        _dfs_tin=tin_d,
+        _dfs_tout=tout_d,
+        _pdom_tin=tin_pd,
+        _pdom_tout=tout_pd,
     )
 
 
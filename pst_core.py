@@ -0,0 +1,324 @@
+"""
+Numba kernels for the integer hot loops of ``compute_pst``.
+
+Numba is optional. When it (or NumPy) is missing ``NUMBA_AVAILABLE`` is
+False and ``pst`` keeps using its pure-Python implementation. The kernels
+mirror ``pst._cycle_equivalence`` and ``pst._idoms`` step for step so both
+paths assign identical class ids.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+# The on-disk cache is keyed by file but records the importing module's
+# name, and the scripts and tests also import this file as top-level
+# ``pst_core``. Only cache under the package name so the two never load
+# each other's entries.
+_CACHE = bool(__package__)
+
+
+def _bl_push(bl_head, bl_tail, bl_size, nxt, prv, linked, bl, edge_id):
+    tail = bl_tail[bl]
+    prv[edge_id] = tail
+    nxt[edge_id] = -1
+    if tail == -1:
+        bl_head[bl] = edge_id
+    else:
+        nxt[tail] = edge_id
+    bl_tail[bl] = edge_id
+    bl_size[bl] += 1
+    linked[edge_id] = 1
+
+
+def _bl_delete(bl_head, bl_tail, bl_size, nxt, prv, linked, bl, edge_id):
+    if not linked[edge_id]:
+        return
+    p = prv[edge_id]
+    q = nxt[edge_id]
+    if p == -1:
+        bl_head[bl] = q
+    else:
+        nxt[p] = q
+    if q == -1:
+        bl_tail[bl] = p
+    else:
+        prv[q] = p
+    linked[edge_id] = 0
+    bl_size[bl] -= 1
+
+
+def _cycle_equivalence_nb(
+    node_count, edge_count, und_ptr, und_edge, und_other, root, out_class_id
+):
+    # Capping backedges get ids edge_count, edge_count + 1, ...; each node
+    # adds at most one.
+    capacity = edge_count + node_count
+    inf = node_count + 1
+
+    dfsnum = np.zeros(node_count, np.int32)
+    parent = np.full(node_count, -1, np.int32)
+    parent_edge = np.full(node_count, -1, np.int32)
+    edge_upper = np.full(edge_count, -1, np.int32)
+    edge_seen = np.zeros(edge_count, np.uint8)
+    postorder = np.empty(node_count, np.int32)
+    post_len = 0
+
+    # Ordered per-node lists, threaded through "next" arrays indexed by the
+    # element (a node has one parent, an edge one endpoint in each list).
+    child_head = np.full(node_count, -1, np.int32)
+    child_tail = np.full(node_count, -1, np.int32)
+    child_next = np.full(node_count, -1, np.int32)
+    from_head = np.full(node_count, -1, np.int32)
+    from_tail = np.full(node_count, -1, np.int32)
+    from_next = np.full(edge_count, -1, np.int32)
+    to_head = np.full(node_count, -1, np.int32)
+    to_tail = np.full(node_count, -1, np.int32)
+    to_next = np.full(edge_count, -1, np.int32)
+    cap_head = np.full(node_count, -1, np.int32)
+    cap_tail = np.full(node_count, -1, np.int32)
+    cap_next = np.full(capacity, -1, np.int32)
+
+    stack_node = np.empty(node_count, np.int32)
+    stack_idx = np.empty(node_count, np.int32)
+
+    time = 0
+    for k in range(-1, node_count):
+        start = root if k < 0 else k
+        if dfsnum[start] != 0:
+            continue
+        time += 1
+        dfsnum[start] = time
+        depth = 1
+        stack_node[0] = start
+        stack_idx[0] = und_ptr[start]
+        while depth > 0:
+            node = stack_node[depth - 1]
+            pos = stack_idx[depth - 1]
+            if pos == und_ptr[node + 1]:
+                postorder[post_len] = node
+                post_len += 1
+                depth -= 1
+                continue
+            stack_idx[depth - 1] = pos + 1
+            edge_id = und_edge[pos]
+            other = und_other[pos]
+            if edge_seen[edge_id]:
+                continue
+            edge_seen[edge_id] = 1
+            if dfsnum[other] == 0:
+                parent[other] = node
+                parent_edge[other] = edge_id
+                if child_tail[node] == -1:
+                    child_head[node] = other
+                else:
+                    child_next[child_tail[node]] = other
+                child_tail[node] = other
+                time += 1
+                dfsnum[other] = time
+                stack_node[depth] = other
+                stack_idx[depth] = und_ptr[other]
+                depth += 1
+            else:
+                if dfsnum[other] < dfsnum[node]:
+                    desc = node
+                    anc = other
+                else:
+                    desc = other
+                    anc = node
+                if from_tail[desc] == -1:
+                    from_head[desc] = edge_id
+                else:
+                    from_next[from_tail[desc]] = edge_id
+                from_tail[desc] = edge_id
+                if to_tail[anc] == -1:
+                    to_head[anc] = edge_id
+                else:
+                    to_next[to_tail[anc]] = edge_id
+                to_tail[anc] = edge_id
+                edge_upper[edge_id] = anc
+
+    node_by_dfsnum = np.zeros(node_count + 1, np.int32)
+    for n in range(node_count):
+        node_by_dfsnum[dfsnum[n]] = n
+
+    bl_head = np.full(node_count, -1, np.int32)
+    bl_tail = np.full(node_count, -1, np.int32)
+    bl_size = np.zeros(node_count, np.int32)
+    nxt = np.full(capacity, -1, np.int32)
+    prv = np.full(capacity, -1, np.int32)
+    linked = np.zeros(capacity, np.uint8)
+    recent_size = np.full(capacity, -1, np.int32)
+    recent_class = np.full(capacity, -1, np.int32)
+    hi = np.full(node_count, inf, np.int32)
+
+    class_counter = 0
+    cap_count = 0
+    for i in range(post_len):
+        n = postorder[i]
+
+        hi0 = inf
+        e = from_head[n]
+        while e != -1:
+            anc = edge_upper[e]
+            if anc != -1 and dfsnum[anc] < hi0:
+                hi0 = dfsnum[anc]
+            e = from_next[e]
+
+        hi1 = inf
+        hi2 = inf
+        c = child_head[n]
+        while c != -1:
+            val = hi[c]
+            if val < hi1:
+                hi2 = hi1
+                hi1 = val
+            elif val < hi2:
+                hi2 = val
+            c = child_next[c]
+
+        hi[n] = hi0 if hi0 < hi1 else hi1
+
+        c = child_head[n]
+        while c != -1:
+            if bl_size[c] != 0:
+                if bl_size[n] == 0:
+                    bl_head[n] = bl_head[c]
+                    bl_tail[n] = bl_tail[c]
+                else:
+                    nxt[bl_tail[c]] = bl_head[n]
+                    prv[bl_head[n]] = bl_tail[c]
+                    bl_head[n] = bl_head[c]
+                bl_size[n] += bl_size[c]
+            c = child_next[c]
+
+        e = cap_head[n]
+        while e != -1:
+            _bl_delete(bl_head, bl_tail, bl_size, nxt, prv, linked, n, e)
+            e = cap_next[e]
+
+        e = to_head[n]
+        while e != -1:
+            _bl_delete(bl_head, bl_tail, bl_size, nxt, prv, linked, n, e)
+            if out_class_id[e] == -1:
+                class_counter += 1
+                out_class_id[e] = class_counter
+            e = to_next[e]
+
+        e = from_head[n]
+        while e != -1:
+            _bl_push(bl_head, bl_tail, bl_size, nxt, prv, linked, n, e)
+            e = from_next[e]
+
+        if hi2 < hi0:
+            upper = node_by_dfsnum[hi2]
+            cap = edge_count + cap_count
+            cap_count += 1
+            _bl_push(bl_head, bl_tail, bl_size, nxt, prv, linked, n, cap)
+            if cap_tail[upper] == -1:
+                cap_head[upper] = cap
+            else:
+                cap_next[cap_tail[upper]] = cap
+            cap_tail[upper] = cap
+
+        if parent[n] != -1:
+            tree_edge = parent_edge[n]
+            top = bl_tail[n]
+            if top == -1:
+                raise ValueError("empty bracket list; graph may not be strongly connected")
+            if recent_size[top] != bl_size[n]:
+                recent_size[top] = bl_size[n]
+                class_counter += 1
+                recent_class[top] = class_counter
+            out_class_id[tree_edge] = recent_class[top]
+            if recent_size[top] == 1 and top < edge_count:
+                out_class_id[top] = out_class_id[tree_edge]
+
+
+def _idoms_nb(postorder, preds_idx, preds_flat, start):
+    total = preds_idx.shape[0] - 1
+    po_num = np.full(total, -1, np.int32)
+    for i in range(postorder.shape[0]):
+        po_num[postorder[i]] = i
+
+    idom = np.full(total, -1, np.int32)
+    idom[start] = start
+    changed = True
+    while changed:
+        changed = False
+        for i in range(postorder.shape[0] - 1, -1, -1):
+            n = postorder[i]
+            if n == start:
+                continue
+            new_idom = -1
+            for k in range(preds_idx[n], preds_idx[n + 1]):
+                p = preds_flat[k]
+                if idom[p] == -1:
+                    continue
+                if new_idom == -1:
+                    new_idom = p
+                    continue
+                f1 = p
+                f2 = new_idom
+                while f1 != f2:
+                    while po_num[f1] < po_num[f2]:
+                        f1 = idom[f1]
+                    while po_num[f2] < po_num[f1]:
+                        f2 = idom[f2]
+                new_idom = f1
+            if idom[n] != new_idom:
+                idom[n] = new_idom
+                changed = True
+    return idom
+
+
+if NUMBA_AVAILABLE:
+    _bl_push = njit(cache=_CACHE)(_bl_push)
+    _bl_delete = njit(cache=_CACHE)(_bl_delete)
+    _cycle_equivalence_nb = njit(cache=_CACHE)(_cycle_equivalence_nb)
+    _idoms_nb = njit(cache=_CACHE)(_idoms_nb)
+
+
+def cycle_equivalence_classes(
+    node_count: int,
+    edge_count: int,
+    und_ptr: Sequence[int],
+    und_edge: Sequence[int],
+    und_other: Sequence[int],
+    root: int,
+) -> List[int]:
+    """Cycle-equivalence class per edge id, -1 where none was assigned."""
+    out_class_id = np.full(edge_count + node_count, -1, np.int32)
+    _cycle_equivalence_nb(
+        node_count,
+        edge_count,
+        np.asarray(und_ptr, dtype=np.int32),
+        np.asarray(und_edge, dtype=np.int32),
+        np.asarray(und_other, dtype=np.int32),
+        root,
+        out_class_id,
+    )
+    return out_class_id[:edge_count].tolist()
+
+
+def idoms(
+    pred_ptr: Sequence[int],
+    pred_idx: Sequence[int],
+    postorder: Sequence[int],
+    start: int,
+) -> List[int]:
+    return _idoms_nb(
+        np.asarray(postorder, dtype=np.int32),
+        np.asarray(pred_ptr, dtype=np.int32),
+        np.asarray(pred_idx, dtype=np.int32),
+        start,
+    ).tolist()
@@ -1,11 +1,29 @@
 import unittest
+from unittest import mock
 
 try:
-    from sese.pst import compute_pst
-    from sese.visualize import cfg_to_dot, pst_to_dot
+    from sese import pst, pst_core
+    from sese.pst import (
+        PSTResult,
+        _augment_graph,
+        _compute_postorder,
+        _dom_tree_intervals,
+        _idoms,
+        compute_pst,
+    )
+    from sese.visualize import cfg_to_dot, cfg_with_regions_to_dot, pst_to_dot
 except ModuleNotFoundError:
-    from pst import compute_pst
-    from visualize import cfg_to_dot, pst_to_dot
+    import pst
+    import pst_core
+    from pst import (
+        PSTResult,
+        _augment_graph,
+        _compute_postorder,
+        _dom_tree_intervals,
+        _idoms,
+        compute_pst,
+    )
+    from visualize import cfg_to_dot, cfg_with_regions_to_dot, pst_to_dot
 
 
 def _make_adj(edges):
@@ -24,64 +42,6 @@ def _make_adj(edges):
     return adj
 
 
-def _unique_label(base, existing):
-    used = set(existing)
-    if base not in used:
-        return base
-    i = 1
-    while True:
-        candidate = f"{base}_{i}"
-        if candidate not in used:
-            return candidate
-        i += 1
-
-
-def _augment_graph(adj):
-    nodes = []
-    seen = set()
-
-    def add_node(n):
-        if n not in seen:
-            seen.add(n)
-            nodes.append(n)
-
-    edges = []
-    for u, info in adj.items():
-        add_node(u)
-        for v in info.get("out", []):
-            add_node(v)
-            edges.append((u, v, "orig"))
-        for v in info.get("in", []):
-            add_node(v)
-
-    indeg = {n: 0 for n in nodes}
-    outdeg = {n: 0 for n in nodes}
-    for u, v, _ in edges:
-        outdeg[u] += 1
-        indeg[v] += 1
-
-    entry_nodes = [n for n in nodes if indeg[n] == 0]
-    exit_nodes = [n for n in nodes if outdeg[n] == 0]
-    if not entry_nodes:
-        entry_nodes = nodes[:]
-    if not exit_nodes:
-        exit_nodes = nodes[:]
-
-    super_entry = _unique_label("__super_entry__", seen)
-    add_node(super_entry)
-    super_exit = _unique_label("__super_exit__", seen)
-    add_node(super_exit)
-
-    for n in entry_nodes:
-        edges.append((super_entry, n, "super_entry"))
-    for n in exit_nodes:
-        edges.append((n, super_exit, "super_exit"))
-
-    edges.append((super_exit, super_entry, "back"))
-
-    return nodes, edges, super_entry, super_exit
-
-
 def _enumerate_cycles(nodes, edges):
     node_index = {n: i for i, n in enumerate(nodes)}
     undirected = [[] for _ in nodes]
@@ -141,7 +101,29 @@ def _dominators(total, start, preds):
     return dom
 
 
-def _dominance_data(nodes, edges, super_entry, super_exit):
+def _dominator_masks(total, start, preds):
+    # Same fixpoint as _dominators, but bit k of dom[n] marks that node k
+    # dominates n.
+    full = (1 << total) - 1
+    dom = [full] * total
+    dom[start] = 1 << start
+    changed = True
+    while changed:
+        changed = False
+        for n in range(total):
+            if n == start:
+                continue
+            inter = full if preds[n] else 0
+            for p in preds[n]:
+                inter &= dom[p]
+            new_dom = inter | (1 << n)
+            if new_dom != dom[n]:
+                dom[n] = new_dom
+                changed = True
+    return dom
+
+
+def _edge_split_adjacency(nodes, edges):
     node_index = {n: i for i, n in enumerate(nodes)}
     edge_node_index = {}
     edge_nodes = []
@@ -165,6 +147,21 @@ def _dominance_data(nodes, edges, super_entry, super_exit):
         succs[e_idx].append(v_idx)
         preds[v_idx].append(e_idx)
 
+    return node_index, edge_node_index, preds, succs
+
+
+def _to_csr(rows):
+    ptr = [0]
+    idx = []
+    for row in rows:
+        idx.extend(row)
+        ptr.append(len(idx))
+    return ptr, idx
+
+
+def _dominance_data(nodes, edges, super_entry, super_exit):
+    node_index, edge_node_index, preds, succs = _edge_split_adjacency(nodes, edges)
+    total = len(preds)
     dom = _dominators(total, node_index[super_entry], preds)
     postdom = _dominators(total, node_index[super_exit], succs)
     return dom, postdom, edge_node_index
@@ -301,6 +298,24 @@ class PSTTests(unittest.TestCase):
         edges = [("S", "A"), ("A", "B"), ("B", "C"), ("C", "B"), ("C", "T")]
         self._assert_matches_naive(edges)
 
+    def test_region_parenting_is_linear_on_sequences(self):
+        chain = [(f"n{i}", f"n{i + 1}") for i in range(1000)]
+        diamonds = []
+        for i in range(250):
+            diamonds += [
+                (f"a{i}", f"b{i}"),
+                (f"a{i}", f"c{i}"),
+                (f"b{i}", f"d{i}"),
+                (f"c{i}", f"d{i}"),
+                (f"d{i}", f"a{i + 1}"),
+            ]
+        for edges in (chain, diamonds):
+            with mock.patch.object(
+                pst, "_region_nested", wraps=pst._region_nested
+            ) as nested:
+                result = compute_pst(_make_adj(edges))
+            self.assertLessEqual(nested.call_count, 2 * len(result.regions))
+
     def test_dot_outputs(self):
         adj = _make_adj([("A", "B"), ("B", "C")])
         result = compute_pst(adj)
@@ -310,6 +325,35 @@ class PSTTests(unittest.TestCase):
         self.assertIn("digraph PST", pst_dot)
         self.assertIn(str(result.super_entry), cfg_dot)
 
+    def test_region_dot_without_dominance_data(self):
+        graphs = [
+            _paper_figure_adj(),
+            _make_adj([("S", "A"), ("A", "B"), ("B", "C"), ("C", "B"), ("C", "T")]),
+        ]
+        for adj in graphs:
+            r = compute_pst(adj)
+            # A hand-built result makes the emitters recompute dominance.
+            stripped = PSTResult(r.root, r.regions, r.edges, r.super_entry, r.super_exit)
+            for include_super in (False, True):
+                for include_back in (False, True):
+                    self.assertEqual(
+                        cfg_with_regions_to_dot(
+                            stripped,
+                            include_super=include_super,
+                            include_back=include_back,
+                        ),
+                        cfg_with_regions_to_dot(
+                            r, include_super=include_super, include_back=include_back
+                        ),
+                    )
+
+    def test_region_dot_reuses_dominance(self):
+        r = compute_pst(_paper_figure_adj())
+        result = PSTResult(r.root, r.regions, r.edges, r.super_entry, r.super_exit)
+        first = cfg_with_regions_to_dot(result)
+        with mock.patch.object(pst, "_idoms", side_effect=AssertionError):
+            self.assertEqual(cfg_with_regions_to_dot(result), first)
+
     def test_diamond_tree_nesting(self):
         edges = [
             ("S", "A"),
@@ -327,6 +371,55 @@ class PSTTests(unittest.TestCase):
         self.assertEqual(result.regions[r2].parent, r3)
         self.assertEqual(result.regions[r5].parent, r3)
 
+    def test_dom_tree_intervals_match_reference(self):
+        graphs = [
+            _paper_figure_adj(),
+            # C and D are unreachable from either super node.
+            _make_adj([("A", "B"), ("C", "D"), ("D", "C")]),
+        ]
+        for adj in graphs:
+            nodes, edges, super_entry, super_exit = _augment_graph(adj)
+            node_index, _, preds, succs = _edge_split_adjacency(nodes, edges)
+            total = len(preds)
+            for start, ins, outs in (
+                (node_index[super_entry], preds, succs),
+                (node_index[super_exit], succs, preds),
+            ):
+                in_ptr, in_idx = _to_csr(ins)
+                out_ptr, out_idx = _to_csr(outs)
+                idom = _idoms(
+                    in_ptr, in_idx, _compute_postorder(out_ptr, out_idx, start), start
+                )
+                tin, tout = _dom_tree_intervals(idom, start)
+                dom = _dominator_masks(total, start, ins)
+                for a in range(total):
+                    for b in range(total):
+                        self.assertEqual(
+                            bool((dom[b] >> a) & 1),
+                            tin[a] <= tin[b] and tout[b] <= tout[a],
+                        )
+
+    @unittest.skipUnless(pst_core.NUMBA_AVAILABLE, "numba not installed")
+    def test_numba_kernels_match_python(self):
+        graphs = [
+            _paper_figure_adj(),
+            _make_adj([("S", "A"), ("A", "B"), ("B", "C"), ("C", "B"), ("C", "T")]),
+        ]
+        for adj in graphs:
+            expected = pst.compute_pst(adj)
+            with mock.patch.object(pst, "_NUMBA_MIN_EDGES", 0):
+                actual = pst.compute_pst(adj)
+                stripped = PSTResult(
+                    actual.root,
+                    actual.regions,
+                    actual.edges,
+                    actual.super_entry,
+                    actual.super_exit,
+                )
+                stripped_dot = cfg_with_regions_to_dot(stripped)
+            self.assertEqual(expected, actual)
+            self.assertEqual(stripped_dot, cfg_with_regions_to_dot(expected))
+
     def test_paper_figure_matches_naive(self):
         result = compute_pst(_paper_figure_adj())
         actual = _pst_pairs(result)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+import io
+from array import array
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from .pst import PSTResult
+from .pst import _EDGE_KINDS, EdgeInfo, PSTResult, _edge_split_dominators
 
 _PRETTY_GRAPH_ATTRS = {
     "rankdir": "LR",
@@ -46,6 +49,23 @@ _REGION_PALETTE = [
 ]
 _REGION_LABEL_ALIGN = "LEFT"
 
+_CFG_EDGE_STYLE = {
+    "back": "style=dotted",
+    "super_entry": "style=dashed",
+    "super_exit": "style=dashed",
+}
+
+_REGION_EDGE_ATTRS = {
+    "back": (
+        'style="dotted"',
+        'color="#90A4AE"',
+        'fontcolor="#90A4AE"',
+        "constraint=false",
+    ),
+    "super_entry": ('style="dashed"', 'color="#78909C"', 'fontcolor="#78909C"'),
+    "super_exit": ('style="dashed"', 'color="#78909C"', 'fontcolor="#78909C"'),
+}
+
 
 def _dot_attrs(attrs: Dict[str, str]) -> str:
     return ", ".join(f'{key}="{value}"' for key, value in attrs.items())
@@ -61,6 +81,19 @@ def _dot_escape_id(value: object) -> str:
     return text.replace("\\", "\\\\").replace('"', '\\"')
 
 
+def _memoized(fn: Callable[[object], str]) -> Callable[[object], str]:
+    # Per-call cache: each node is escaped once however many edges touch it.
+    cache: Dict[object, str] = {}
+
+    def lookup(value: object) -> str:
+        text = cache.get(value)
+        if text is None:
+            text = cache[value] = fn(value)
+        return text
+
+    return lookup
+
+
 def _dot_escape_label(value: object) -> str:
     text = str(value)
     return text.replace('"', '\\"')
@@ -108,58 +141,89 @@ def _edge_label(edge_id: int, class_id: int, kind: str) -> str:
     return label
 
 
+def _edge_label_attrs(result: PSTResult) -> Dict[int, str]:
+    # Labels depend only on the edge, so they are built once per result.
+    labels = result._render_cache.get("edge_labels")
+    if labels is None:
+        labels = {}
+        for edge in result.edges.values():
+            label = _edge_label(edge.id, edge.class_id, edge.kind)
+            labels[edge.id] = f'label="{_dot_escape_label(label)}"'
+        result._render_cache["edge_labels"] = labels
+    return labels
+
+
+def _edge_partition(
+    result: PSTResult,
+) -> Tuple[List[EdgeInfo], List[EdgeInfo], List[EdgeInfo]]:
+    # Non-back edges, original CFG edges and back edges, each in edge order.
+    cached = result._render_cache.get("edge_partition")
+    if cached is None:
+        forward = [edge for edge in result.edges.values() if edge.kind != "back"]
+        orig = [edge for edge in forward if edge.kind == "orig"]
+        back = [edge for edge in result.edges.values() if edge.kind == "back"]
+        cached = (forward, orig, back)
+        result._render_cache["edge_partition"] = cached
+    return cached
+
+
 def cfg_to_dot(result: PSTResult, *, include_back: bool = False) -> str:
+    super_entry = result.super_entry
+    super_exit = result.super_exit
+    forward, _, back = _edge_partition(result)
+    live_edges = forward + back if include_back else forward
     nodes: set[object] = set()
-    for edge in result.edges.values():
-        if edge.kind == "back" and not include_back:
-            continue
+    for edge in live_edges:
         nodes.add(edge.src)
         nodes.add(edge.dst)
 
-    lines = ["digraph CFG {", "  rankdir=LR;"]
-    for node in sorted(nodes, key=lambda n: str(n)):
+    escape_id = _memoized(_dot_escape_id)
+    node_text = _memoized(str)
+    edge_labels = _edge_label_attrs(result)
+    buf = io.StringIO()
+    w = buf.write
+    w("digraph CFG {\n  rankdir=LR;\n")
+    for node in sorted(nodes, key=node_text):
         attrs: list[str] = []
-        if node == result.super_entry or node == result.super_exit:
+        if node == super_entry or node == super_exit:
             attrs.append("shape=doublecircle")
         display_label = _display_node_label(node, result)
-        if display_label != str(node):
+        if display_label != node_text(node):
             attrs.append(f'label="{_dot_escape_label(display_label)}"')
-        label = _dot_escape_id(node)
+        label = escape_id(node)
         if attrs:
-            lines.append(f'  "{label}" [{", ".join(attrs)}];')
+            w(f'  "{label}" [{", ".join(attrs)}];\n')
         else:
-            lines.append(f'  "{label}";')
+            w(f'  "{label}";\n')
 
-    for edge in result.edges.values():
-        if edge.kind == "back" and not include_back:
-            continue
+    for edge in live_edges:
         attrs: list[str] = []
-        if edge.kind == "back":
-            attrs.append("style=dotted")
-        elif edge.kind in ("super_entry", "super_exit"):
-            attrs.append("style=dashed")
-        label = _edge_label(edge.id, edge.class_id, edge.kind)
-        attrs.append(f'label="{_dot_escape_label(label)}"')
-        src = _dot_escape_id(edge.src)
-        dst = _dot_escape_id(edge.dst)
+        style = _CFG_EDGE_STYLE.get(edge.kind)
+        if style is not None:
+            attrs.append(style)
+        attrs.append(edge_labels[edge.id])
+        src = escape_id(edge.src)
+        dst = escape_id(edge.dst)
         if attrs:
             attrs_text = ", ".join(attrs)
-            lines.append(f'  "{src}" -> "{dst}" [{attrs_text}];')
+            w(f'  "{src}" -> "{dst}" [{attrs_text}];\n')
         else:
-            lines.append(f'  "{src}" -> "{dst}";')
+            w(f'  "{src}" -> "{dst}";\n')
 
-    lines.append("}")
-    return "\n".join(lines) + "\n"
+    w("}\n")
+    return buf.getvalue()
 
 
 def pst_to_dot(result: PSTResult) -> str:
-    lines = ["digraph PST {", "  node [shape=box];"]
+    buf = io.StringIO()
+    w = buf.write
+    w("digraph PST {\n  node [shape=box];\n")
 
     for region_id in sorted(result.regions):
         region = result.regions[region_id]
         if region_id == result.root:
             label = _region_label_table(["root"])
-            lines.append(f'  "R{region_id}" [label=<{label}>];')
+            w(f'  "R{region_id}" [label=<{label}>];\n')
         else:
             entry = result.edges[region.entry_edge]
             exit = result.edges[region.exit_edge]
@@ -168,88 +232,108 @@ def pst_to_dot(result: PSTResult) -> str:
             label = _region_label_table(
                 [f"<B>R{region_id}</B>", entry_label, exit_label]
             )
-            lines.append(f'  "R{region_id}" [label=<{label}>];')
+            w(f'  "R{region_id}" [label=<{label}>];\n')
 
     for region_id in sorted(result.regions):
         region = result.regions[region_id]
         for child in region.children:
-            lines.append(f'  "R{region_id}" -> "R{child}";')
-
-    lines.append("}")
-    return "\n".join(lines) + "\n"
+            w(f'  "R{region_id}" -> "R{child}";\n')
 
-
-def _dominators(total: int, start: int, preds: List[List[int]]) -> List[Set[int]]:
-    dom = [set(range(total)) for _ in range(total)]
-    dom[start] = {start}
-    changed = True
-    while changed:
-        changed = False
-        for n in range(total):
-            if n == start:
-                continue
-            if not preds[n]:
-                new_dom = {n}
-            else:
-                inter = set(range(total))
-                for p in preds[n]:
-                    inter &= dom[p]
-                new_dom = inter | {n}
-            if new_dom != dom[n]:
-                dom[n] = new_dom
-                changed = True
-    return dom
+    w("}\n")
+    return buf.getvalue()
 
 
 def _edge_split_graph(
     result: PSTResult,
-) -> Tuple[List[object], Dict[object, int], Dict[int, int], List[Set[int]], List[Set[int]]]:
-    edges = [edge for _, edge in sorted(result.edges.items()) if edge.kind != "back"]
+) -> Tuple[
+    List[object],
+    Dict[object, int],
+    Dict[int, int],
+    Tuple[List[int], List[int]],
+    Tuple[List[int], List[int]],
+]:
+    cached = result._render_cache.get("edge_split")
+    if cached is not None:
+        return cached
+
+    if result._node_index is not None and result._dfs_tin is not None:
+        # compute_pst already numbered the same edge-split graph.
+        cached = (
+            list(result._node_index),
+            result._node_index,
+            result._edge_node_index,
+            (result._dfs_tin, result._dfs_tout),
+            (result._pdom_tin, result._pdom_tout),
+        )
+        result._render_cache["edge_split"] = cached
+        return cached
+
+    edges = sorted(result.edges.values(), key=lambda edge: edge.id)
     nodes: List[object] = []
     node_index: Dict[object, int] = {}
-
-    def add_node(n: object) -> None:
-        if n not in node_index:
-            node_index[n] = len(nodes)
-            nodes.append(n)
-
-    for edge in edges:
-        add_node(edge.src)
-        add_node(edge.dst)
-
-    edge_node_index: Dict[int, int] = {}
-    for edge in edges:
-        edge_node_index[edge.id] = len(nodes) + len(edge_node_index)
-
-    total = len(nodes) + len(edge_node_index)
-    preds: List[List[int]] = [[] for _ in range(total)]
-    succs: List[List[int]] = [[] for _ in range(total)]
-
-    for edge in edges:
-        u_idx = node_index[edge.src]
-        v_idx = node_index[edge.dst]
-        e_idx = edge_node_index[edge.id]
-        succs[u_idx].append(e_idx)
-        preds[e_idx].append(u_idx)
-        succs[e_idx].append(v_idx)
-        preds[v_idx].append(e_idx)
-
-    start = node_index[result.super_entry]
-    end = node_index[result.super_exit]
-    dom = _dominators(total, start, preds)
-    postdom = _dominators(total, end, succs)
-
-    return nodes, node_index, edge_node_index, dom, postdom
+    edge_u = array("i", [0]) * len(edges)
+    edge_v = array("i", [0]) * len(edges)
+    edge_kind = array("b", [0]) * len(edges)
+    for pos, edge in enumerate(edges):
+        for n in (edge.src, edge.dst):
+            if n not in node_index:
+                node_index[n] = len(nodes)
+                nodes.append(n)
+        edge_u[pos] = node_index[edge.src]
+        edge_v[pos] = node_index[edge.dst]
+        edge_kind[pos] = _EDGE_KINDS.index(edge.kind)
+
+    edge_node_index, _, dom, postdom = _edge_split_dominators(
+        len(nodes),
+        edge_u,
+        edge_v,
+        edge_kind,
+        node_index[result.super_entry],
+        node_index[result.super_exit],
+    )
+    # The arrays are indexed by position; key the edge nodes by edge id.
+    edge_node_index = {edges[pos].id: idx for pos, idx in edge_node_index.items()}
+
+    cached = (nodes, node_index, edge_node_index, dom, postdom)
+    result._render_cache["edge_split"] = cached
+    return cached
+
+
+def _preorder(tin: List[int], keep: List[int]) -> Tuple[List[int], List[int]]:
+    # Dominator-tree subtrees are contiguous runs of the DFS preorder;
+    # unreachable nodes (tin == total) sit outside it.
+    total = len(tin)
+    slots = [-1] * total
+    unreached: List[int] = []
+    for idx in keep:
+        if tin[idx] < total:
+            slots[tin[idx]] = idx
+        else:
+            unreached.append(idx)
+    return slots, unreached
 
 
 def _region_node_sets(
     result: PSTResult, *, include_super: bool
 ) -> Dict[int, Set[object]]:
+    key = ("region_nodes", include_super)
+    cached = result._render_cache.get(key)
+    if cached is not None:
+        return cached
+
     nodes, node_index, edge_node_index, dom, postdom = _edge_split_graph(result)
     region_nodes: Dict[int, Set[object]] = {region_id: set() for region_id in result.regions}
 
+    super_nodes = (result.super_entry, result.super_exit)
+    keep = [node_index[n] for n in nodes if include_super or n not in super_nodes]
+    tin_d, tout_d = dom
+    tin_pd, tout_pd = postdom
+    dom_order, dom_unreached = _preorder(tin_d, keep)
+    pdom_order, pdom_unreached = _preorder(tin_pd, keep)
+
+    root = result.root
     for region_id, region in result.regions.items():
-        if region_id == result.root:
+        if region_id == root:
             continue
         if region.entry_edge is None or region.exit_edge is None:
             continue
@@ -257,16 +341,60 @@ def _region_node_sets(
         exit_idx = edge_node_index.get(region.exit_edge)
         if entry_idx is None or exit_idx is None:
             continue
-        for node in nodes:
-            if not include_super and node in (result.super_entry, result.super_exit):
-                continue
-            idx = node_index[node]
-            if entry_idx in dom[idx] and exit_idx in postdom[idx]:
-                region_nodes[region_id].add(node)
-
+        # Walk the shorter of the two subtree slices and keep the nodes
+        # that the other tree's interval test accepts; unreachable nodes
+        # are in every subtree of their own tree.
+        dom_len = tout_d[entry_idx] - tin_d[entry_idx]
+        pdom_len = tout_pd[exit_idx] - tin_pd[exit_idx]
+        if dom_len <= pdom_len:
+            lo, hi = tin_pd[exit_idx], tout_pd[exit_idx]
+            scan = dom_order[tin_d[entry_idx] : tout_d[entry_idx] + 1]
+            members = [
+                idx
+                for idx in chain(scan, dom_unreached)
+                if idx != -1 and lo <= tin_pd[idx] and tout_pd[idx] <= hi
+            ]
+        else:
+            lo, hi = tin_d[entry_idx], tout_d[entry_idx]
+            scan = pdom_order[tin_pd[exit_idx] : tout_pd[exit_idx] + 1]
+            members = [
+                idx
+                for idx in chain(scan, pdom_unreached)
+                if idx != -1 and lo <= tin_d[idx] and tout_d[idx] <= hi
+            ]
+        members.sort()
+        region_nodes[region_id].update(nodes[idx] for idx in members)
+
+    result._render_cache[key] = region_nodes
     return region_nodes
 
 
+def _region_depths(result: PSTResult) -> Tuple[List[int], List[int]]:
+    cached = result._render_cache.get("region_depths")
+    if cached is not None:
+        return cached
+
+    # Region ids are small dense ints, so depths live in a list.
+    depth = [0] * (max(result.regions) + 1)
+    stack = [result.root]
+    while stack:
+        region_id = stack.pop()
+        for child in result.regions[region_id].children:
+            depth[child] = depth[region_id] + 1
+            stack.append(child)
+
+    # Depths are small, so bucket the regions deepest first; each bucket
+    # keeps region order, as the stable sort did.
+    buckets: List[List[int]] = [[] for _ in range(max(depth) + 1)]
+    for rid in result.regions:
+        if rid != result.root:
+            buckets[depth[rid]].append(rid)
+    regions_by_depth = [rid for bucket in reversed(buckets) for rid in bucket]
+    cached = (depth, regions_by_depth)
+    result._render_cache["region_depths"] = cached
+    return cached
+
+
 def cfg_with_regions_to_dot(
     result: PSTResult,
     *,
@@ -275,150 +403,132 @@ def cfg_with_regions_to_dot(
     include_back: bool = False,
     show_edge_labels: bool = True,
 ) -> str:
+    super_entry = result.super_entry
+    super_exit = result.super_exit
+    super_nodes = (super_entry, super_exit)
+    regions = result.regions
+    edges = result.edges
+    root = result.root
     region_nodes = _region_node_sets(result, include_super=include_super)
 
-    depth: Dict[int, int] = {result.root: 0}
-    stack = [result.root]
-    while stack:
-        region_id = stack.pop()
-        for child in result.regions[region_id].children:
-            depth[child] = depth[region_id] + 1
-            stack.append(child)
+    depth, regions_by_depth = _region_depths(result)
 
     assigned: Dict[object, int] = {}
-    regions_by_depth = sorted(
-        [rid for rid in result.regions if rid != result.root],
-        key=lambda rid: depth.get(rid, 0),
-        reverse=True,
-    )
     for region_id in regions_by_depth:
         for node in region_nodes.get(region_id, set()):
             if node not in assigned:
                 assigned[node] = region_id
 
-    assigned_nodes: Dict[int, List[object]] = {rid: [] for rid in result.regions}
+    assigned_nodes: Dict[int, List[object]] = {rid: [] for rid in regions}
     for node, region_id in assigned.items():
         assigned_nodes[region_id].append(node)
 
-    def edge_visible(edge) -> bool:
-        if edge.kind == "back" and not include_back:
-            return False
-        if not include_super:
-            if edge.kind in ("super_entry", "super_exit", "back"):
-                return False
-            if edge.src in (result.super_entry, result.super_exit):
-                return False
-            if edge.dst in (result.super_entry, result.super_exit):
-                return False
-        return True
-
-    def emit_node(lines: List[str], node: object, indent: str) -> None:
+    escape_id = _memoized(_dot_escape_id)
+    node_text = _memoized(str)
+    edge_labels = _edge_label_attrs(result)
+
+    def emit_node(node: object, indent: str) -> None:
         attrs: list[str] = []
-        if node == result.super_entry or node == result.super_exit:
+        if node == super_entry or node == super_exit:
             attrs.append("shape=doublecircle")
             attrs.append('fillcolor="#ECEFF1"')
             attrs.append('color="#607D8B"')
             attrs.append('penwidth="1.4"')
         display_label = _display_node_label(node, result)
-        if display_label != str(node):
+        if display_label != node_text(node):
             attrs.append(f'label="{_dot_escape_label(display_label)}"')
-        label = _dot_escape_id(node)
+        label = escape_id(node)
         if attrs:
-            lines.append(f'{indent}"{label}" [{", ".join(attrs)}];')
+            w(f'{indent}"{label}" [{", ".join(attrs)}];\n')
         else:
-            lines.append(f'{indent}"{label}";')
+            w(f'{indent}"{label}";\n')
 
-    def emit_region(lines: List[str], region_id: int, indent: str) -> None:
-        region = result.regions[region_id]
-        if region_id != result.root or include_root:
-            lines.append(f"{indent}subgraph cluster_R{region_id} {{")
+    def emit_region(region_id: int, indent: str) -> None:
+        region = regions[region_id]
+        if region_id != root or include_root:
+            w(f"{indent}subgraph cluster_R{region_id} {{\n")
             next_indent = f"{indent}  "
-            if region_id == result.root:
+            if region_id == root:
                 label = _region_label_table(["root"])
-                lines.append(f'{next_indent}label=<{label}>;')
+                w(f'{next_indent}label=<{label}>;\n')
             else:
-                entry = result.edges[region.entry_edge]
-                exit = result.edges[region.exit_edge]
+                entry = edges[region.entry_edge]
+                exit = edges[region.exit_edge]
                 entry_label = _edge_pair_label_html(entry.src, entry.dst, result)
                 exit_label = _edge_pair_label_html(exit.src, exit.dst, result)
                 label = _region_label_table(
                     [f"<B>R{region_id}</B>", entry_label, exit_label]
                 )
-                lines.append(f'{next_indent}label=<{label}>;')
-            lines.append(f'{next_indent}labelloc="t";')
-            lines.append(f'{next_indent}labeljust="l";')
-            fill, border = _region_colors(depth.get(region_id, 0))
-            lines.append(f'{next_indent}style="rounded,filled";')
-            lines.append(f'{next_indent}color="{border}";')
-            lines.append(f'{next_indent}fillcolor="{fill}";')
-            lines.append(f'{next_indent}fontcolor="#37474F";')
-            lines.append(f'{next_indent}fontsize="11";')
-            lines.append(f'{next_indent}fontname="Helvetica";')
-            lines.append(f'{next_indent}penwidth="1.2";')
+                w(f'{next_indent}label=<{label}>;\n')
+            w(f'{next_indent}labelloc="t";\n')
+            w(f'{next_indent}labeljust="l";\n')
+            fill, border = _region_colors(depth[region_id])
+            w(f'{next_indent}style="rounded,filled";\n')
+            w(f'{next_indent}color="{border}";\n')
+            w(f'{next_indent}fillcolor="{fill}";\n')
+            w(f'{next_indent}fontcolor="#37474F";\n')
+            w(f'{next_indent}fontsize="11";\n')
+            w(f'{next_indent}fontname="Helvetica";\n')
+            w(f'{next_indent}penwidth="1.2";\n')
         else:
             next_indent = indent
 
         for child in region.children:
-            emit_region(lines, child, next_indent)
+            emit_region(child, next_indent)
 
-        for node in sorted(assigned_nodes.get(region_id, []), key=lambda n: str(n)):
-            emit_node(lines, node, next_indent)
+        for node in sorted(assigned_nodes.get(region_id, []), key=node_text):
+            emit_node(node, next_indent)
 
-        if region_id != result.root or include_root:
-            lines.append(f"{indent}}}")
+        if region_id != root or include_root:
+            w(f"{indent}}}\n")
 
-    lines = [
-        "digraph CFG {",
-        f"  graph [{_dot_attrs(_PRETTY_GRAPH_ATTRS)}];",
-        f"  node [{_dot_attrs(_PRETTY_NODE_ATTRS)}];",
-        f"  edge [{_dot_attrs(_PRETTY_EDGE_ATTRS)}];",
-    ]
+    buf = io.StringIO()
+    w = buf.write
+    w("digraph CFG {\n")
+    w(f"  graph [{_dot_attrs(_PRETTY_GRAPH_ATTRS)}];\n")
+    w(f"  node [{_dot_attrs(_PRETTY_NODE_ATTRS)}];\n")
+    w(f"  edge [{_dot_attrs(_PRETTY_EDGE_ATTRS)}];\n")
 
     if include_root:
-        emit_region(lines, result.root, "  ")
+        emit_region(root, "  ")
     else:
-        for child in result.regions[result.root].children:
-            emit_region(lines, child, "  ")
+        for child in regions[root].children:
+            emit_region(child, "  ")
 
+    forward, orig, back = _edge_partition(result)
+    if include_super:
+        live_edges = forward + back if include_back else forward
+    else:
+        live_edges = [
+            edge
+            for edge in orig
+            if edge.src not in super_nodes and edge.dst not in super_nodes
+        ]
     emitted_nodes = set(assigned.keys())
-    for edge in result.edges.values():
-        if not edge_visible(edge):
-            continue
+    for edge in live_edges:
         for node in (edge.src, edge.dst):
             if node in emitted_nodes:
                 continue
-            if not include_super and node in (result.super_entry, result.super_exit):
+            if not include_super and node in super_nodes:
                 continue
-            if node in (result.super_entry, result.super_exit):
-                emit_node(lines, node, "  ")
+            if node in super_nodes:
+                emit_node(node, "  ")
                 emitted_nodes.add(node)
                 continue
-            emit_node(lines, node, "  ")
+            emit_node(node, "  ")
             emitted_nodes.add(node)
 
-    for edge in result.edges.values():
-        if not edge_visible(edge):
-            continue
-        attrs: list[str] = []
-        if edge.kind == "back":
-            attrs.append('style="dotted"')
-            attrs.append('color="#90A4AE"')
-            attrs.append('fontcolor="#90A4AE"')
-            attrs.append("constraint=false")
-        elif edge.kind in ("super_entry", "super_exit"):
-            attrs.append('style="dashed"')
-            attrs.append('color="#78909C"')
-            attrs.append('fontcolor="#78909C"')
+    for edge in live_edges:
+        attrs = list(_REGION_EDGE_ATTRS.get(edge.kind, ()))
         if show_edge_labels:
-            label = _edge_label(edge.id, edge.class_id, edge.kind)
-            attrs.append(f'label="{_dot_escape_label(label)}"')
-        src = _dot_escape_id(edge.src)
-        dst = _dot_escape_id(edge.dst)
+            attrs.append(edge_labels[edge.id])
+        src = escape_id(edge.src)
+        dst = escape_id(edge.dst)
         if attrs:
             attrs_text = ", ".join(attrs)
-            lines.append(f'  "{src}" -> "{dst}" [{attrs_text}];')
+            w(f'  "{src}" -> "{dst}" [{attrs_text}];\n')
         else:
-            lines.append(f'  "{src}" -> "{dst}";')
+            w(f'  "{src}" -> "{dst}";\n')
 
-    lines.append("}")
-    return "\n".join(lines) + "\n"
+    w("}\n")
+    return buf.getvalue()